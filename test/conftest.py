@@ -1,11 +1,52 @@
+import os
+import sys
 import tempfile
 from pathlib import Path
 from typing import Generator
+from unittest.mock import patch
 
 import pytest
 
+from whitespace_asm import asm
+
+
+@pytest.fixture(scope="session", autouse=True)
+def ram_base_temp(tmp_path_factory: pytest.TempPathFactory) -> None:
+    # Keep pytest's temporary directories in RAM on Linux unless the user picked a location.
+    # Only redirect tempfile while the base directory is created so other tempfile users are
+    # not affected
+    if (
+        "TMPDIR" not in os.environ
+        and sys.platform.startswith("linux")
+        and os.path.isdir("/dev/shm")
+    ):
+        with patch.object(tempfile, "tempdir", "/dev/shm"):
+            tmp_path_factory.getbasetemp()
+
+
+@pytest.fixture()
+def in_temp_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("wsasm")
+
 
 @pytest.fixture()
-def in_temp_dir() -> Generator[Path, None, None]:
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        yield Path(tmp_dir)
+def mock_assemble():
+    with patch.object(asm, "assemble") as mock:
+        yield mock
+
+
+@pytest.fixture()
+def fake_fs() -> Generator[dict[str, str], None, None]:
+    files: dict[str, str] = {}
+
+    def read_bytes(path: Path) -> bytes:
+        return files[str(path)].encode("utf-8")
+
+    def write_bytes(path: Path, data: bytes) -> int:
+        files[str(path)] = data.decode("utf-8")
+        return len(data)
+
+    with patch.object(Path, "read_bytes", read_bytes), patch.object(
+        Path, "write_bytes", write_bytes
+    ):
+        yield files
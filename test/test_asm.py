@@ -1,10 +1,13 @@
+from functools import cache
 from pathlib import Path
-from unittest.mock import patch
 
 import pytest
 
 from whitespace_asm import asm
 
+# Directory for the main tests that use the fake file system. Nothing is created on disk
+FAKE_DIR = Path("fake-dir")
+
 
 @pytest.mark.parametrize(
     "input_filename,expected_output_filename",
@@ -15,20 +18,19 @@ from whitespace_asm import asm
 )
 def test_main_with_defaults(
     mock_assemble,
+    fake_fs: dict[str, str],
     input_filename: str,
     expected_output_filename: str,
-    in_temp_dir: Path,
 ):
     mock_assemble.return_value = ("Some output", [])
 
-    input_path = in_temp_dir / input_filename
-    input_path.write_text("Some input", encoding="utf-8")
+    input_path = FAKE_DIR / input_filename
+    fake_fs[str(input_path)] = "Some input"
 
     asm.main([str(input_path)])
 
-    output_path = in_temp_dir / expected_output_filename
-    output_contents = output_path.read_text(encoding="utf-8")
-    assert output_contents == "Some output"
+    output_path = FAKE_DIR / expected_output_filename
+    assert fake_fs[str(output_path)] == "Some output"
 
     mock_assemble.assert_called_once_with("Some input", "mark")
 
@@ -36,59 +38,68 @@ def test_main_with_defaults(
 @pytest.mark.parametrize(
     "option,output_filename", [("-o", "output1.ws"), ("--output", "output2.ws")]
 )
-def test_main_with_output(mock_assemble, option: str, output_filename: str, in_temp_dir: Path):
+def test_main_with_output(
+    mock_assemble, fake_fs: dict[str, str], option: str, output_filename: str
+):
     mock_assemble.return_value = ("This output", [])
 
-    input_path = in_temp_dir / "this-file.wsasm"
-    input_path.write_text("This input", encoding="utf-8")
+    input_path = FAKE_DIR / "this-file.wsasm"
+    fake_fs[str(input_path)] = "This input"
 
-    output_path = in_temp_dir / output_filename
+    output_path = FAKE_DIR / output_filename
     asm.main([str(input_path), option, str(output_path)])
 
-    output_contents = output_path.read_text(encoding="utf-8")
-    assert output_contents == "This output"
+    assert fake_fs[str(output_path)] == "This output"
 
     mock_assemble.assert_called_once_with("This input", "mark")
 
 
 @pytest.mark.parametrize("option,format_type", [("-f", "raw"), ("--format", "mark")])
-def test_main_with_mark(mock_assemble, option: str, format_type: str, in_temp_dir: Path):
+def test_main_with_mark(mock_assemble, fake_fs: dict[str, str], option: str, format_type: str):
     mock_assemble.return_value = ("My output", [])
 
-    input_path = in_temp_dir / "my-file.wsasm"
-    input_path.write_text("My input", encoding="utf-8")
+    input_path = FAKE_DIR / "my-file.wsasm"
+    fake_fs[str(input_path)] = "My input"
 
     asm.main([str(input_path), option, format_type])
 
-    output_path = in_temp_dir / "my-file.ws"
-    output_contents = output_path.read_text(encoding="utf-8")
-    assert output_contents == "My output"
+    output_path = FAKE_DIR / "my-file.ws"
+    assert fake_fs[str(output_path)] == "My output"
 
     mock_assemble.assert_called_once_with("My input", format_type)
 
 
-def test_main_with_errors(mock_assemble, in_temp_dir, capsys):
+def test_main_with_errors(mock_assemble, fake_fs: dict[str, str], capsys):
     mock_assemble.return_value = ("Something", ["4: Error1", "6: Error2"])
 
-    input_path = in_temp_dir / "file.wsasm"
-    input_path.write_text("Some input", encoding="utf-8")
+    input_path = FAKE_DIR / "file.wsasm"
+    fake_fs[str(input_path)] = "Some input"
 
     with pytest.raises(SystemExit) as exc:
         asm.main([str(input_path)])
 
     assert exc.value.code != 0
-    assert not (in_temp_dir / "file.ws").exists()
+    assert str(FAKE_DIR / "file.ws") not in fake_fs
 
-    err = capsys.readouterr().err
     expected_errors = """\
 4: Error1
 6: Error2
 """
-    assert expected_errors in err
+    assert capsys.readouterr().err == expected_errors
 
     mock_assemble.assert_called_once_with("Some input", "mark")
 
 
+def test_main_keeps_line_feeds(in_temp_dir: Path):
+    input_path = in_temp_dir / "crlf.wsasm"
+    input_path.write_bytes(b"push 1\r\noutn\r\n")
+
+    asm.main([str(input_path), "--format", "raw"])
+
+    output_path = in_temp_dir / "crlf.ws"
+    assert output_path.read_bytes() == b"   \t\n\t\n \t"
+
+
 @pytest.mark.parametrize(
     "line,expected_tokens",
     [
@@ -157,6 +168,7 @@ def test_main_with_errors(mock_assemble, in_temp_dir, capsys):
             id="keyword-empty-char-parameter-extra-invalid-param",
         ),
         pytest.param("abc '", ["abc", "'"], id="keyword-unterm-char-param"),
+        pytest.param("1a \xa0\t\rx", ["1a", "x"], id="keyword-other-whitespace-token-skipped"),
     ],
 )
 def test_tokenize_line(line: str, expected_tokens: list[str]):
@@ -188,11 +200,25 @@ def test_parse_tokens(tokens: list[str], expected_keyword, expected_params, expe
     assert command.comment == expected_comment
 
 
+def test_parsed_command_defaults():
+    command = asm.ParsedCommand()
+    command.keyword = "push"
+    command.params.append("1")
+
+    assert command == asm.ParsedCommand(keyword="push", params=["1"], comment="")
+    assert not asm.ParsedCommand().params
+
+
 @pytest.mark.parametrize(
     "param,expected_result",
     [
         pytest.param("12345", 12345, id="positive-int"),
         pytest.param("-571", -571, id="negative-int"),
+        pytest.param("+88", 88, id="plus-sign-int"),
+        pytest.param("1_000", 1000, id="underscore-int"),
+        pytest.param("1__000", None, id="double-underscore"),
+        pytest.param("_1", None, id="leading-underscore"),
+        pytest.param("", None, id="empty"),
         pytest.param("1.2", None, id="positive-float"),
         pytest.param("-3.14", None, id="negative-float"),
         pytest.param("'x'", None, id="string"),
@@ -211,6 +237,19 @@ def test_parse_number(param: str, expected_result: int | None):
         pytest.param("'\\n'", "\n", id="newline"),
         pytest.param("'\\t'", "\t", id="tab"),
         pytest.param("'abcde'", "abcde", id="multi-char"),
+        pytest.param("'\\''", "'", id="escaped-quote"),
+        pytest.param('"B"', "B", id="double-quoted"),
+        pytest.param("'\u00e9'", "\u00e9", id="non-ascii"),
+        pytest.param("'\u20ac\u20ac'", "\u20ac\u20ac", id="non-latin-1"),
+        pytest.param("'\\\u20ac'", "\\\u20ac", id="backslash-non-latin-1"),
+        pytest.param("'\\u20ac'", "\u20ac", id="unicode-escape"),
+        pytest.param("'a\\\r\nb'", "ab", id="line-continuation"),
+        pytest.param("'\n'", None, id="unescaped-newline"),
+        pytest.param("'a\0b'", None, id="null-char"),
+        pytest.param("'\\x4'", None, id="invalid-escape"),
+        pytest.param("'a'b'", None, id="unescaped-quote"),
+        pytest.param("'\\'", None, id="escaped-end-quote"),
+        pytest.param("'''", None, id="unescaped-only-quote"),
         pytest.param("42", None, id="positive-int"),
         pytest.param("-53", None, id="negative-int"),
         pytest.param("3.14", None, id="positive-float"),
@@ -231,6 +270,7 @@ def test_parse_string(param: str, expected_result: str | None):
         pytest.param("0110", "0110", id="valid-binary"),
         pytest.param("1x0001", None, id="invalid-binary-letter"),
         pytest.param("1101211", None, id="invalid-binary-digit"),
+        pytest.param("", None, id="empty"),
     ],
 )
 def test_parse_label(param: str, expected_result: str | None):
@@ -291,6 +331,7 @@ def test_parse_label(param: str, expected_result: str | None):
             "Expected zeros and ones, but got junk instead",
             id="invalid-label-letters",
         ),
+        pytest.param("0110", asm.WhitespaceParamType.NONE, "0110", "", id="none-as-label"),
     ],
 )
 def test_parse_param(
@@ -305,8 +346,11 @@ def test_parse_param(
     assert error == expected_error
 
 
+EXPECTED_RESULT_TABLE = str.maketrans({"S": asm.SPACE, "T": asm.TAB, "L": asm.LF})
+
+
 def get_expected_result(result: str):
-    return result.replace("S", asm.SPACE).replace("T", asm.TAB).replace("L", asm.LF)
+    return result.translate(EXPECTED_RESULT_TABLE)
 
 
 @pytest.mark.parametrize(
@@ -324,12 +368,30 @@ def get_expected_result(result: str):
             get_expected_result("TTTTTSTTL"),
             id="num-negative-int",
         ),
+        pytest.param(
+            1000,
+            asm.WhitespaceParamType.NUMBER,
+            get_expected_result("STTTTTSTSSSL"),
+            id="num-large-positive-int",
+        ),
+        pytest.param(
+            -300,
+            asm.WhitespaceParamType.NUMBER,
+            get_expected_result("TTSSTSTTSSL"),
+            id="num-large-negative-int",
+        ),
         pytest.param(
             "Z", asm.WhitespaceParamType.VALUE, get_expected_result("STSTTSTSL"), id="char"
         ),
         pytest.param(
             "00110101", asm.WhitespaceParamType.LABEL, get_expected_result("SSTTSTSTL"), id="label"
         ),
+        pytest.param(
+            -5, asm.WhitespaceParamType.NONE, get_expected_result("TTSTL"), id="none-as-number"
+        ),
+        pytest.param(
+            "A", asm.WhitespaceParamType.NONE, get_expected_result("STSSSSSTL"), id="none-as-char"
+        ),
     ],
 )
 def test_translate_param(
@@ -340,132 +402,156 @@ def test_translate_param(
     assert result == expected_result
 
 
-@pytest.mark.parametrize(
-    "keyword,params,expected_instruction,expected_error",
-    [
-        pytest.param("junk", [], None, "Invalid instruction junk", id="invalid-keyword"),
-    ]
-    + [
-        pytest.param(
+def test_translate_param_label_not_string():
+    with pytest.raises(TypeError, match="Expected label string, but got 101"):
+        asm.translate_param(101, asm.WhitespaceParamType.LABEL)
+
+
+PARAM_KEYWORDS = ("push", "copy", "slide", "label", "call", "jump", "jumpz", "jumpn")
+NO_PARAM_KEYWORDS = (
+    "dup",
+    "swap",
+    "pop",
+    "add",
+    "sub",
+    "div",
+    "mod",
+    "store",
+    "retr",
+    "ret",
+    "end",
+    "outc",
+    "outn",
+    "inc",
+    "inn",
+)
+TRANSLATE_INSTRUCTION_ERROR_PARAMS = {
+    "invalid-keyword": ("junk", [], "Invalid instruction junk"),
+    **{
+        f"{keyword}-{id_suffix}": (
             keyword,
             params,
-            None,
             f"Expected 1 parameter for {keyword}, but got {len(params)}",
-            id=f"{keyword}-{id_suffix}",
         )
-        for keyword in ["push", "copy", "slide", "label", "call", "jump", "jumpz", "jumpn"]
+        for keyword in PARAM_KEYWORDS
         for params, id_suffix in [([], "too-few"), (["1", "'x'"], "too-many")]
-    ]
-    + [
-        pytest.param(
+    },
+    **{
+        f"{keyword}-too-many-{len(params)}": (
             keyword,
             params,
-            None,
             f"Expected no parameters for {keyword}, but got {len(params)}",
-            id=f"{keyword}-too-many-{len(params)}",
         )
-        for keyword in [
-            "dup",
-            "swap",
-            "pop",
-            "add",
-            "sub",
-            "div",
-            "mod",
-            "store",
-            "retr",
-            "ret",
-            "end",
-            "outc",
-            "outn",
-            "inc",
-            "inn",
-        ]
+        for keyword in NO_PARAM_KEYWORDS
         for params in [["'a'"], ["'q'", "5"]]
-    ]
-    + [
-        pytest.param("", [], "", "", id="comment"),
-        pytest.param("dup", [], "SLS", "", id="dup"),
-        pytest.param("swap", [], "SLT", "", id="swap"),
-        pytest.param("pop", [], "SLL", "", id="pop"),
-        pytest.param("add", [], "TSSS", "", id="add"),
-        pytest.param("sub", [], "TSST", "", id="sub"),
-        pytest.param("mult", [], "TSSL", "", id="mult"),
-        pytest.param("div", [], "TSTS", "", id="div"),
-        pytest.param("mod", [], "TSTT", "", id="mod"),
-        pytest.param("store", [], "TTS", "", id="store"),
-        pytest.param("retr", [], "TTT", "", id="retr"),
-        pytest.param("ret", [], "LTL", "", id="ret"),
-        pytest.param("end", [], "LLL", "", id="end"),
-        pytest.param("outc", [], "TLSS", "", id="outc"),
-        pytest.param("outn", [], "TLST", "", id="outn"),
-        pytest.param("inc", [], "TLTS", "", id="inc"),
-        pytest.param("inn", [], "TLTT", "", id="inn"),
-        pytest.param("push", ["33"], "SSSTSSSSTL", "", id="push-pos-num"),
-        pytest.param("push", ["-25"], "SSTTTSSTL", "", id="push-neg-num"),
-        pytest.param("push", ["'X'"], "SSSTSTTSSSL", "", id="push-char"),
-        pytest.param(
-            "push",
-            ["x"],
-            None,
-            "Expected number or single character, but got x instead",
-            id="push-invalid",
-        ),
-        pytest.param("copy", ["8"], "STSSTSSSL", "", id="copy-pos-num"),
-        pytest.param("copy", ["-7"], "STSTTTTL", "", id="copy-neg-num"),
-        pytest.param(
-            "copy", ["'X'"], None, "Expected number, but got 'X' instead", id="copy-invalid"
-        ),
-        pytest.param("slide", ["2"], "STLSTSL", "", id="slide-pos-num"),
-        pytest.param("slide", ["-4"], "STLTTSSL", "", id="slide-neg-num"),
-        pytest.param(
-            "slide", ["Y"], None, "Expected number, but got Y instead", id="slide-invalid"
-        ),
-        pytest.param("label", ["0101"], "LSSSTSTL", "", id="label-valid"),
-        pytest.param(
-            "label",
-            ["'a'"],
-            None,
-            "Expected zeros and ones, but got 'a' instead",
-            id="label-invalid",
-        ),
-        pytest.param("call", ["11000"], "LSTTTSSSL", "", id="call-valid"),
-        pytest.param(
-            "call", ["2"], None, "Expected zeros and ones, but got 2 instead", id="call-invalid"
-        ),
-        pytest.param("jump", ["0110"], "LSLSTTSL", "", id="jump-valid"),
-        pytest.param(
-            "jump", ["X"], None, "Expected zeros and ones, but got X instead", id="jump-invalid"
-        ),
-        pytest.param("jumpz", ["1010"], "LTSTSTSL", "", id="jumpz-valid"),
-        pytest.param(
-            "jumpz",
-            ["123"],
-            None,
-            "Expected zeros and ones, but got 123 instead",
-            id="jumpz-invalid",
-        ),
-        pytest.param("jumpn", ["000111"], "LTTSSSTTTL", "", id="jumpn-valid"),
-        pytest.param(
-            "jumpn", ["5"], None, "Expected zeros and ones, but got 5 instead", id="jumpn-invalid"
-        ),
-    ],
+    },
+    "push-invalid": ("push", ["x"], "Expected number or single character, but got x instead"),
+    "copy-invalid": ("copy", ["'X'"], "Expected number, but got 'X' instead"),
+    "slide-invalid": ("slide", ["Y"], "Expected number, but got Y instead"),
+    "label-invalid": ("label", ["'a'"], "Expected zeros and ones, but got 'a' instead"),
+    "call-invalid": ("call", ["2"], "Expected zeros and ones, but got 2 instead"),
+    "jump-invalid": ("jump", ["X"], "Expected zeros and ones, but got X instead"),
+    "jumpz-invalid": ("jumpz", ["123"], "Expected zeros and ones, but got 123 instead"),
+    "jumpn-invalid": ("jumpn", ["5"], "Expected zeros and ones, but got 5 instead"),
+}
+
+
+@pytest.mark.parametrize(
+    "keyword,params,expected_error",
+    TRANSLATE_INSTRUCTION_ERROR_PARAMS.values(),
+    ids=TRANSLATE_INSTRUCTION_ERROR_PARAMS.keys(),
 )
-def test_translate_instruction(
-    keyword: str, params: list[str], expected_instruction: str | None, expected_error: str
-):
-    instruction, error = asm.translate_instruction(keyword, params)
+def test_translate_instruction_error(keyword: str, params: list[str], expected_error: str):
+    instruction, error = asm.translate_instruction(keyword, tuple(params))
 
-    expected_instruction = (
-        get_expected_result(expected_instruction) if expected_instruction is not None else None
-    )
-    assert instruction == expected_instruction
+    assert instruction is None
     assert error == expected_error
 
-    instruction, error = asm.translate_instruction(keyword.upper(), params)
 
-    assert instruction == expected_instruction
-    assert error == expected_error
+TRANSLATE_INSTRUCTION_NO_PARAMS = {
+    "comment": ("", ""),
+    "dup": ("dup", "SLS"),
+    "swap": ("swap", "SLT"),
+    "pop": ("pop", "SLL"),
+    "add": ("add", "TSSS"),
+    "sub": ("sub", "TSST"),
+    "mult": ("mult", "TSSL"),
+    "div": ("div", "TSTS"),
+    "mod": ("mod", "TSTT"),
+    "store": ("store", "TTS"),
+    "retr": ("retr", "TTT"),
+    "ret": ("ret", "LTL"),
+    "end": ("end", "LLL"),
+    "outc": ("outc", "TLSS"),
+    "outn": ("outn", "TLST"),
+    "inc": ("inc", "TLTS"),
+    "inn": ("inn", "TLTT"),
+}
+
+
+@pytest.mark.parametrize(
+    "keyword,expected_instruction",
+    TRANSLATE_INSTRUCTION_NO_PARAMS.values(),
+    ids=TRANSLATE_INSTRUCTION_NO_PARAMS.keys(),
+)
+def test_translate_instruction_no_params(keyword: str, expected_instruction: str):
+    instruction, error = asm.translate_instruction(keyword, ())
+
+    assert instruction == get_expected_result(expected_instruction)
+    assert error == ""
+
+
+TRANSLATE_INSTRUCTION_WITH_PARAMS = {
+    "push-pos-num": ("push", ["33"], "SSSTSSSSTL"),
+    "push-neg-num": ("push", ["-25"], "SSTTTSSTL"),
+    "push-char": ("push", ["'X'"], "SSSTSTTSSSL"),
+    "copy-pos-num": ("copy", ["8"], "STSSTSSSL"),
+    "copy-neg-num": ("copy", ["-7"], "STSTTTTL"),
+    "slide-pos-num": ("slide", ["2"], "STLSTSL"),
+    "slide-neg-num": ("slide", ["-4"], "STLTTSSL"),
+    "label-valid": ("label", ["0101"], "LSSSTSTL"),
+    "call-valid": ("call", ["11000"], "LSTTTSSSL"),
+    "jump-valid": ("jump", ["0110"], "LSLSTTSL"),
+    "jumpz-valid": ("jumpz", ["1010"], "LTSTSTSL"),
+    "jumpn-valid": ("jumpn", ["000111"], "LTTSSSTTTL"),
+}
+
+
+@pytest.mark.parametrize(
+    "keyword,params,expected_instruction",
+    TRANSLATE_INSTRUCTION_WITH_PARAMS.values(),
+    ids=TRANSLATE_INSTRUCTION_WITH_PARAMS.keys(),
+)
+def test_translate_instruction_with_params(
+    keyword: str, params: list[str], expected_instruction: str
+):
+    instruction, error = asm.translate_instruction(keyword, tuple(params))
+
+    assert instruction == get_expected_result(expected_instruction)
+    assert error == ""
+
+
+PARAMS_BY_TYPE = {
+    asm.WhitespaceParamType.NONE: [],
+    asm.WhitespaceParamType.NUMBER: ["-7"],
+    asm.WhitespaceParamType.VALUE: ["'X'"],
+    asm.WhitespaceParamType.LABEL: ["0101"],
+}
+
+
+@pytest.mark.parametrize(
+    "keyword,params",
+    [pytest.param("junk", [], id="invalid-keyword"), pytest.param("pop", ["1"], id="pop-invalid")]
+    + [
+        pytest.param(keyword, PARAMS_BY_TYPE[info.param_type], id=keyword)
+        for keyword, info in asm.TRANSLATION_TABLE.items()
+        if keyword
+    ],
+)
+def test_translate_instruction_case_insensitive(keyword: str, params: list[str]):
+    result = asm.translate_instruction(keyword.upper(), tuple(params))
+
+    assert result == asm.translate_instruction(keyword, tuple(params))
 
 
 @pytest.mark.parametrize(
@@ -487,6 +573,11 @@ def test_format_instruction(format_type: str, instruction: str, expected_output:
     assert output == expected_output
 
 
+@cache
+def read_example(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
 def get_example_params() -> list:
     params = []
     for dir_path in Path("examples").iterdir():
@@ -509,16 +600,16 @@ def get_example_params() -> list:
 
 @pytest.mark.parametrize("input_path,format_type,expected_output_path", get_example_params())
 def test_assemble(input_path: Path, format_type: str, expected_output_path: Path):
-    input_contents = input_path.read_text(encoding="utf-8")
+    input_contents = read_example(input_path)
     output_contents, errors = asm.assemble(input_contents, format_type)
 
-    expected_output_contents = expected_output_path.read_text(encoding="utf-8")
+    expected_output_contents = read_example(expected_output_path)
     assert output_contents == expected_output_contents
     assert not errors
 
 
 def test_assemble_bad():
-    input_contents = Path("examples/bad/bad.wsasm").read_text(encoding="utf-8")
+    input_contents = read_example(Path("examples/bad/bad.wsasm"))
     output_contents, errors = asm.assemble(input_contents, "raw")
 
     assert not output_contents
@@ -532,9 +623,3 @@ def test_assemble_bad():
         "Line 9: Expected 1 parameter for push, but got 2",
     ]
     assert errors == expected_errors
-
-
-@pytest.fixture()
-def mock_assemble():
-    with patch("whitespace_asm.asm.assemble") as mock:
-        yield mock
@@ -1,10 +1,11 @@
 import argparse
-import ast
+import re
 import sys
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cache, lru_cache
 from pathlib import Path
-from typing import Callable
+from typing import Callable, NamedTuple
 
 
 # Whitespace parameter type
@@ -16,8 +17,7 @@ class WhitespaceParamType(Enum):
 
 
 # Whitespace command information
-@dataclass
-class WhitespaceInfo:
+class WhitespaceInfo(NamedTuple):
     command: str
     param_type: WhitespaceParamType = WhitespaceParamType.NONE
 
@@ -34,6 +34,26 @@ HEAP = f"{TAB}{TAB}"  # Heap Access
 FLOW = LF  # Flow Control
 IO = f"{TAB}{LF}"  # I/O
 
+# A token is either a comment (";" to the end of the line) or a run of quoted strings and
+# unquoted characters up to the next space, tab, or ";". A backslash escapes the next character
+TOKEN_REGEX = re.compile(r";.*|(?:'(?:\\.?|[^'\\])*'?|\\.?|[^ \t;'\\])+", re.DOTALL)
+
+# Parameter patterns
+NUMBER_REGEX = re.compile(r"[-+]?\d+(?:_\d+)*")
+STRING_REGEX = re.compile(r"""(['"])((?:\\(?:\r\n|[^\0])|(?!\1)[^\\\n\r\0])*)\1""")
+
+# Escape sequences in a string. A backslash before a character outside Latin-1 is not an escape
+ESCAPE_REGEX = re.compile(
+    r"\\(?:\r\n?|N\{[^}]*\}?|x[0-9a-fA-F]{0,2}|u[0-9a-fA-F]{0,4}|U[0-9a-fA-F]{0,8}|[0-7]{1,3}|"
+    r"[\x00-\xff])"
+)
+
+# Translation table for binary digits: 0 is a space, 1 is a tab
+BINARY_DIGITS_TABLE = str.maketrans({"0": SPACE, "1": TAB})
+
+# Translation table for "mark" format: precede each whitespace character with its abbreviation
+MARK_TABLE = str.maketrans({SPACE: f"S{SPACE}", TAB: f"T{TAB}", LF: f"L{LF}"})
+
 # Key is keyword, value is information about Whitespace command
 TRANSLATION_TABLE: dict[str, WhitespaceInfo] = {
     # Comment
@@ -70,7 +90,8 @@ TRANSLATION_TABLE: dict[str, WhitespaceInfo] = {
 }
 
 
-def main(args: list | None = None):
+@cache
+def get_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument("input", help="path to the input Whitespace Assembly file")
     parser.add_argument(
@@ -91,10 +112,15 @@ def main(args: list | None = None):
             "by S (space), T (tab), and L (newline)"
         ),
     )
-    parsed_args = parser.parse_args(args)
+
+    return parser
+
+
+def main(args: list[str] | None = None) -> None:
+    parsed_args = get_arg_parser().parse_args(args)
 
     input_path = Path(parsed_args.input)
-    input_contents = input_path.read_text(encoding="utf-8")
+    input_contents = input_path.read_bytes().decode("utf-8")
 
     output_contents, errors = assemble(input_contents, parsed_args.format)
     if parsed_args.output:
@@ -108,98 +134,41 @@ def main(args: list | None = None):
 
         sys.exit(1)
 
-    output_path.write_text(output_contents, encoding="utf-8")
+    output_path.write_bytes(output_contents.encode("utf-8"))
 
 
 def assemble(input_contents: str, format_type: str) -> tuple[str, list[str]]:
-    output_contents = ""
+    output_parts = []
     errors = []
     for line_num, line in enumerate(input_contents.splitlines(), start=1):
+        stripped_line = line.lstrip()
+        if not stripped_line or stripped_line.startswith(";"):
+            continue
+
+        # Blank and comment-only lines were skipped, so the first token is the keyword
         tokens = tokenize_line(line)
-        command = parse_tokens(tokens)
-        instruction, error = translate_instruction(command.keyword, command.params)
+        if tokens[-1].startswith(";"):
+            tokens.pop()
+
+        instruction, error = translate_instruction(tokens[0], tuple(tokens[1:]))
         if instruction is None:
             errors.append(f"Line {line_num}: {error}")
-        else:
-            output_contents += format_instruction(format_type, instruction)
+        elif not errors:
+            output_parts.append(instruction)
 
-    if errors:
-        output_contents = ""
+    output_contents = ""
+    if not errors:
+        output_contents = format_instruction(format_type, "".join(output_parts))
 
     return output_contents, errors
 
 
-@dataclass
-class TokenizerState:
-    line: str
-    idx: int = 0
-
-    def curr(self) -> str:
-        ch = self.get_char()
-        self.unget_char(ch)
-        return ch
-
-    def next(self) -> str:
-        ch = ""
-        if self.idx < len(self.line):
-            ch = self.line[self.idx]
-            self.idx += 1
-
-        return ch
-
-    def get_char(self) -> str:
-        ch = self.next()
-        if ch == "\\":
-            ch += self.next()
-
-        return ch
-
-    def unget_char(self, ch: str):
-        self.idx = max(0, self.idx - len(ch))
-
-    def take_while(self, pred: Callable[[str], bool]) -> str:
-        token = ""
-        while (ch := self.get_char()) and pred(ch):
-            token += ch
-
-        self.unget_char(ch)
-        return token
-
-    def take_until(self, pred: Callable[[str], bool]) -> str:
-        token = ""
-        while ch := self.get_char():
-            token += ch
-            if pred(ch):
-                break
-
-        return token
-
-
 def tokenize_line(line: str) -> list[str]:
-    state = TokenizerState(line)
-    tokens = []
-    while token := get_next_token(state):
-        tokens.append(token)
-
-    return tokens
-
-
-def get_next_token(state: TokenizerState) -> str:
-    token = ""
-    state.take_while(lambda ch: ch in " \t")
-    if state.curr() == ";":
-        token += state.take_while(lambda _: True)
-
-    while (ch := state.curr()) and ch not in " ;\t":
-        if ch == "'":
-            token += state.get_char() + state.take_until(lambda ch: ch == "'")
-        else:
-            token += state.take_while(lambda ch: ch not in " \t';")
+    tokens = [token.strip() for token in TOKEN_REGEX.findall(line)]
+    return [token for token in tokens if token]
 
-    return token.strip()
 
-
-@dataclass
+@dataclass(slots=True)
 class ParsedCommand:
     keyword: str = ""
     params: list[str] = field(default_factory=list)
@@ -220,26 +189,33 @@ def parse_tokens(tokens: list[str]) -> ParsedCommand:
 
 def parse_number(param: str) -> int | None:
     result: int | None = None
-    try:
+    if NUMBER_REGEX.fullmatch(param):
         result = int(param)
-    except ValueError:
-        pass
 
     return result
 
 
 def parse_string(param: str) -> str | None:
     result: str | None = None
-    try:
-        value = ast.literal_eval(param)
-        if isinstance(value, str):
-            result = value
-    except (ValueError, SyntaxError):
-        pass
+    if len(param) == 3 and param[0] == param[2] == "'" and param[1] not in "'\\\n\r\0":
+        result = param[1]
+    elif match := STRING_REGEX.fullmatch(param):
+        try:
+            result = ESCAPE_REGEX.sub(decode_escape, match[2])
+        except UnicodeDecodeError:
+            pass
 
     return result
 
 
+def decode_escape(match: re.Match[str]) -> str:
+    escape = match[0]
+    if escape[1] == "\r":  # Line continuation
+        return ""
+
+    return escape.encode("latin-1", "backslashreplace").decode("unicode_escape")
+
+
 def parse_value(param: str) -> int | str | None:
     result: int | str | None = parse_number(param)
     if result is None:
@@ -252,34 +228,44 @@ def parse_value(param: str) -> int | str | None:
 
 def parse_label(param: str) -> str | None:
     result: str | None = None
-    if param and all(ch in "01" for ch in param):
+    if param and not param.strip("01"):
         result = param
 
     return result
 
 
 def parse_param(param: str, param_type: WhitespaceParamType) -> tuple[str | int | None, str]:
-    result: str | int | None = None
-    if param_type == WhitespaceParamType.NUMBER:
-        expected_type = "number"
-        result = parse_number(param)
-    elif param_type == WhitespaceParamType.VALUE:
-        expected_type = "number or single character"
-        result = parse_value(param)
-    else:
-        expected_type = "zeros and ones"
-        result = parse_label(param)
-
+    # Anything that is not a number or a value is parsed as a label
+    param_type_info = (
+        PARAM_TYPE_TABLE.get(param_type) or PARAM_TYPE_TABLE[WhitespaceParamType.LABEL]
+    )
+    result = param_type_info.parse(param)
     error = ""
     if result is None:
-        error = f"Expected {expected_type}, but got {param} instead"
+        error = format_param_error(param_type_info.expected_type, param)
 
     return result, error
 
 
-def translate_number(param: int) -> str:
+def format_param_error(expected_type: str, param: str) -> str:
+    return f"Expected {expected_type}, but got {param} instead"
+
+
+def encode_number(param: int) -> str:
     sign = SPACE if param >= 0 else TAB
-    return sign + bin(abs(param))[2:].replace("0", SPACE).replace("1", TAB) + LF
+    return sign + f"{abs(param):b}".translate(BINARY_DIGITS_TABLE) + LF
+
+
+# Key is number, value is encoded number. Covers small constants and character codes
+NUMBER_TABLE: dict[int, str] = {num: encode_number(num) for num in range(-128, 256)}
+
+
+def translate_number(param: int) -> str:
+    result = NUMBER_TABLE.get(param)
+    if result is None:
+        result = encode_number(param)
+
+    return result
 
 
 def translate_string(param: str) -> str:
@@ -287,40 +273,101 @@ def translate_string(param: str) -> str:
 
 
 def translate_label(param: str) -> str:
-    return param.replace("0", SPACE).replace("1", TAB) + LF
+    return param.translate(BINARY_DIGITS_TABLE) + LF
 
 
-def translate_param(param: int | str, param_type: WhitespaceParamType) -> str:
-    if param_type == WhitespaceParamType.LABEL:
-        return translate_label(param)  # type: ignore
-
+def translate_value(param: int | str) -> str:
     if isinstance(param, int):
         return translate_number(param)
 
     return translate_string(param)
 
 
-def translate_instruction(keyword: str, params: list[str]) -> tuple[str | None, str]:
+# Parameter type information. encode parses and translates a parameter, returning None if the
+# parameter is invalid
+class ParamTypeInfo(NamedTuple):
+    expected_type: str
+    parse: Callable[[str], int | str | None]
+    encode: Callable[[str], str | None]
+
+
+def encode_number_param(param: str) -> str | None:
+    value = parse_number(param)
+    return None if value is None else translate_number(value)
+
+
+def encode_value_param(param: str) -> str | None:
+    value = parse_value(param)
+    return None if value is None else translate_value(value)
+
+
+def encode_label_param(param: str) -> str | None:
+    value = parse_label(param)
+    return None if value is None else translate_label(value)
+
+
+# Key is parameter type, value is how to parse and encode that type of parameter
+PARAM_TYPE_TABLE: dict[WhitespaceParamType, ParamTypeInfo] = {
+    WhitespaceParamType.NUMBER: ParamTypeInfo("number", parse_number, encode_number_param),
+    WhitespaceParamType.VALUE: ParamTypeInfo(
+        "number or single character", parse_value, encode_value_param
+    ),
+    WhitespaceParamType.LABEL: ParamTypeInfo("zeros and ones", parse_label, encode_label_param),
+}
+
+
+def translate_param(param: int | str, param_type: WhitespaceParamType) -> str:
+    if param_type != WhitespaceParamType.LABEL:
+        return translate_value(param)
+
+    if not isinstance(param, str):
+        raise TypeError(f"Expected label string, but got {param!r}")
+
+    return translate_label(param)
+
+
+InstructionEncoder = Callable[[tuple[str, ...]], tuple[str | None, str]]
+
+
+def make_encoder(keyword: str, translation_info: WhitespaceInfo) -> InstructionEncoder:
+    command, param_type = translation_info
+    param_type_info = PARAM_TYPE_TABLE.get(param_type)
+    num_params = 0 if param_type_info is None else 1
+    expected_params = "no parameters" if param_type_info is None else "1 parameter"
+
+    def encode(params: tuple[str, ...]) -> tuple[str | None, str]:
+        instruction: str | None = None
+        error = ""
+        if len(params) != num_params:
+            error = f"Expected {expected_params} for {keyword}, but got {len(params)}"
+        elif param_type_info is None:
+            instruction = command
+        elif (encoded_param := param_type_info.encode(params[0])) is None:
+            error = format_param_error(param_type_info.expected_type, params[0])
+        else:
+            instruction = command + encoded_param
+
+        return instruction, error
+
+    return encode
+
+
+# Key is keyword, value is function that encodes the instruction for the given parameters
+INSTRUCTION_ENCODERS: dict[str, InstructionEncoder] = {
+    keyword: make_encoder(keyword, translation_info)
+    for keyword, translation_info in TRANSLATION_TABLE.items()
+}
+
+
+@lru_cache(maxsize=4096)
+def translate_instruction(keyword: str, params: tuple[str, ...]) -> tuple[str | None, str]:
     instruction: str | None = None
-    error = ""
     keyword_lower = keyword.lower()
-    translation_info = TRANSLATION_TABLE.get(keyword_lower)
-    num_params = len(params)
-    if not translation_info:
-        error = f"Invalid instruction {keyword_lower}"
-    elif translation_info.param_type == WhitespaceParamType.NONE and num_params != 0:
-        error = f"Expected no parameters for {keyword_lower}, but got {num_params}"
-    elif translation_info.param_type != WhitespaceParamType.NONE and num_params != 1:
-        error = f"Expected 1 parameter for {keyword_lower}, but got {num_params}"
+    encoder = INSTRUCTION_ENCODERS.get(keyword_lower)
+    if encoder:
+        instruction, error = encoder(params)
     else:
-        if num_params:
-            value, error = parse_param(params[0], translation_info.param_type)
-            if value is not None:
-                instruction = translation_info.command + translate_param(
-                    value, translation_info.param_type
-                )
-        else:
-            instruction = translation_info.command
+        error = f"Invalid instruction {keyword_lower}"
 
     return instruction, error
 
@@ -328,10 +375,6 @@ def translate_instruction(keyword: str, params: list[str]) -> tuple[str | None,
 def format_instruction(format_type: str, instruction: str) -> str:
     output_contents = instruction
     if format_type == "mark":
-        output_contents = (
-            output_contents.replace(SPACE, f"S{SPACE}")
-            .replace(TAB, f"T{TAB}")
-            .replace(LF, f"L{LF}")
-        )
+        output_contents = output_contents.translate(MARK_TABLE)
 
     return output_contents